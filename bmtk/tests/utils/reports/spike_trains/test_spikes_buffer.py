@@ -133,6 +133,131 @@ def test_iterator(spiketrain_buffer):
     assert(np.all(np.diff(v1_node_times) >= 0))
 
 
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_iterator_time_window(spiketrain_buffer):
+    st = spiketrain_buffer
+    st.add_spikes(node_ids=0, timestamps=np.linspace(0.1, 1.0, 10, endpoint=True))
+    st.add_spikes(node_ids=5, timestamps=[5.0, 4.5, 6.5, 7.0, 1.5, 0.0])
+    st.add_spikes(population='V2', node_ids=0, timestamps=np.linspace(0.1, 1.0, 10, endpoint=True))
+
+    spikes = list(st.spikes(time_window=(0.5, 4.5)))
+    assert(len(spikes) == 14)
+    assert(all(0.5 <= t <= 4.5 for t, _, _ in spikes))
+
+    spikes = list(st.spikes(populations='V1', time_window=(0.5, 4.5), sort_order=sort_order.by_time))
+    assert(np.allclose([t for t, _, _ in spikes], [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.5, 4.5]))
+    assert(all(p == 'V1' for _, p, _ in spikes))
+
+    spikes = list(st.spikes(populations='V2', time_window=(0.5, 4.5), sort_order=sort_order.by_id))
+    assert(len(spikes) == 6)
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_iterator_time_sorted(spiketrain_buffer):
+    # spikes added in order of time, then an out of order spike
+    st = spiketrain_buffer
+    for t in np.linspace(0.0, 10.0, 11):
+        st.add_spike(node_id=int(t) % 3, timestamp=t)
+    st.add_spikes(node_ids=[0, 1], timestamps=[11.0, 12.0])
+
+    spikes = list(st.spikes(time_window=(2.5, 7.0), sort_order=sort_order.by_time))
+    assert(np.allclose([t for t, _, _ in spikes], [3.0, 4.0, 5.0, 6.0, 7.0]))
+
+    st.add_spike(node_id=2, timestamp=4.5)
+    spikes = list(st.spikes(time_window=(2.5, 7.0), sort_order=sort_order.by_time))
+    assert(np.allclose([t for t, _, _ in spikes], [3.0, 4.0, 4.5, 5.0, 6.0, 7.0]))
+
+    spikes = list(st.spikes(sort_order=sort_order.by_id))
+    assert(np.all(np.diff([n for _, _, n in spikes]) >= 0))
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_spikes_arrays(spiketrain_buffer):
+    st = spiketrain_buffer
+    timestamps, populations, node_ids = st.spikes_arrays()
+    assert(len(timestamps) == len(populations) == len(node_ids) == 0)
+
+    st.add_spikes(node_ids=5, timestamps=[5.0, 4.5, 6.5, 7.0, 1.5, 0.0])
+    st.add_spikes(node_ids=[2, 1, 0], timestamps=[2.0, 2.5, 3.0])
+    st.add_spikes(population='V2', node_ids=0, timestamps=np.linspace(0.1, 1.0, 10, endpoint=True))
+
+    for kwargs in [{}, {'sort_order': sort_order.by_time}, {'sort_order': sort_order.by_id},
+                   {'populations': 'V1', 'time_window': (1.5, 5.0), 'sort_order': sort_order.by_time}]:
+        timestamps, populations, node_ids = st.spikes_arrays(**kwargs)
+        spikes = list(st.spikes(**kwargs))
+        assert(np.allclose(timestamps, [s[0] for s in spikes]))
+        assert(list(populations) == [s[1] for s in spikes])
+        assert(np.all(node_ids == [s[2] for s in spikes]))
+        assert(node_ids.dtype == np.uint64)
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_time_range(spiketrain_buffer):
+    st = spiketrain_buffer
+    assert(st.time_range() == (np.inf, -np.inf))
+
+    st.add_spike(node_id=0, timestamp=5.0)
+    st.add_spikes(node_ids=1, timestamps=[3.0, 7.0])
+    st.add_spikes(node_ids=[2, 3], timestamps=[100.0, 50.0], population='V2')
+    assert(np.allclose(st.time_range(), (3.0, 7.0)))
+    assert(np.allclose(st.time_range('V2'), (50.0, 100.0)))
+    assert(np.allclose(st.time_range(['V1', 'V2']), (3.0, 100.0)))
+
+    st.add_spike(node_id=0, timestamp=1.0)
+    assert(np.allclose(st.time_range(), (1.0, 7.0)))
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_get_times_time_window(spiketrain_buffer):
+    st = spiketrain_buffer
+    st.add_spikes(node_ids=[5, 0, 5, 3, 5], timestamps=[9.0, 1.0, 3.0, 2.0, 6.0])
+    assert(np.allclose(np.sort(st.get_times(5)), [3.0, 6.0, 9.0]))
+    assert(np.allclose(np.sort(st.get_times(5, time_window=(3.0, 6.0))), [3.0, 6.0]))
+    assert(len(st.get_times(5, time_window=(10.0, 20.0))) == 0)
+    assert(len(st.get_times(4)) == 0)
+
+    st.add_spike(node_id=5, timestamp=4.0)
+    assert(np.allclose(np.sort(st.get_times(5, time_window=(3.0, 6.0))), [3.0, 4.0, 6.0]))
+
+    # repeated queries, which some buffers answer using an index of the spikes
+    for _ in range(20):
+        assert(np.allclose(np.sort(st.get_times(5, time_window=(3.0, 6.0))), [3.0, 4.0, 6.0]))
+        assert(np.allclose(st.get_times(3), [2.0]))
+        assert(len(st.get_times(4)) == 0)
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array')
+])
+def test_get_times_sorted(spiketrain_buffer):
+    # times are returned in order whether or not the population has been indexed yet
+    st = spiketrain_buffer
+    st.add_spikes(node_ids=[5, 5, 5], timestamps=[9.0, 1.0, 3.0])
+    for _ in range(2*st.node_index_min_queries):
+        assert(list(st.get_times(5)) == [1.0, 3.0, 9.0])
+
+
 @pytest.mark.parametrize('spiketrain_buffer', [
     STMemoryBuffer(default_population='V1', store_type='list'),
     STMemoryBuffer(default_population='V1', store_type='array'),
@@ -158,6 +283,72 @@ def test_no_spikes(spiketrain_buffer):
     assert(list(st.spikes()) == [])
 
 
+def test_csv_buffer_add():
+    st = STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+    st.add_spikes(node_ids=[], timestamps=[], population='V9')
+    assert(st.populations == [])
+
+    st.add_spike(node_id=np.uint64(3), timestamp=1.0)
+    st.add_spike(node_id=4.0, timestamp=2.0)
+    assert(st.populations == ['V1'])
+    assert(np.all(np.sort(st.node_ids()) == [3, 4]))
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array')
+])
+def test_add_after_read(spiketrain_buffer):
+    # reads must see spikes added since the previous read
+    st = spiketrain_buffer
+    for i in range(5):
+        st.add_spike(node_id=i % 2, timestamp=float(i))
+        assert(list(st.get_times(0)) == [float(t) for t in range(0, i + 1, 2)])
+        assert(len(st.spikes_arrays()[0]) == i + 1)
+
+    st.add_spikes(node_ids=[1, 0], timestamps=[10.0, 11.0])
+    assert([s[2] for s in st.spikes()] == [0, 1, 0, 1, 0, 1, 0])
+    assert(list(st.to_dataframe(sort_order=sort_order.by_time)['timestamps'])[-2:] == [10.0, 11.0])
+
+
+def test_memory_buffer_node_id_range():
+    # list store keeps the node_ids as they were added
+    st = STMemoryBuffer(default_population='V1', store_type='list')
+    st.add_spikes(node_ids=[2**32 + 5], timestamps=[1.0])
+    assert([s[2] for s in st.spikes()] == [2**32 + 5])
+    st.add_spike(node_id=-1, timestamp=2.0)
+    assert([s[2] for s in st.spikes()] == [2**32 + 5, -1])
+    assert(np.allclose(st.get_times(node_id=2**32 + 5), [1.0]))
+    assert(len(st.get_times(node_id=5)) == 0)
+
+    # array store can only hold 32-bit unsigned node_ids
+    st = STMemoryBuffer(default_population='V1', store_type='array')
+    for node_ids in [[2**32 + 5], [-1], 2**32]:
+        with pytest.raises(OverflowError):
+            st.add_spikes(node_ids=node_ids, timestamps=[1.0])
+    assert(st.populations == [])
+
+
+@pytest.mark.parametrize('spiketrain_buffer', [
+    STMemoryBuffer(default_population='V1', store_type='list'),
+    STMemoryBuffer(default_population='V1', store_type='array'),
+    STCSVBuffer(default_population='V1', cache_dir=tempfile.mkdtemp())
+])
+def test_large_buffer(spiketrain_buffer):
+    # Make sure buffers can grow past any initial size
+    st = spiketrain_buffer
+    for node_id in range(5000):
+        st.add_spike(node_id=node_id, timestamp=float(node_id))
+    st.add_spikes(node_ids=np.arange(10000), timestamps=np.linspace(0.0, 100.0, 10000), population='V2')
+
+    assert(st.n_spikes('V1') == 5000)
+    assert(st.n_spikes('V2') == 10000)
+    assert(len(st) == 15000)
+    assert(np.allclose(st.get_times(node_id=4999), [4999.0]))
+    assert(np.allclose(st.get_times(node_id=9999, population='V2'), [100.0]))
+    assert(len(list(st.spikes(populations='V2'))) == 10000)
+
+
 if __name__ == '__main__':
     # if MPI_size == 1:
     #     #single_proc(spike_train_buffer.STCSVBuffer)
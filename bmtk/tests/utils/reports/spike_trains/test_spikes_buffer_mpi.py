@@ -3,7 +3,7 @@ import numpy as np
 import tempfile
 from six import string_types
 
-
+from bmtk.utils.reports.spike_trains import sort_order
 from bmtk.utils.reports.spike_trains.spike_train_buffer import STMPIBuffer, STCSVMPIBufferV2
 
 try:
@@ -41,6 +41,7 @@ def test_basic(st):
     assert(st.n_spikes('V2') == MPI_size)
     assert(st.n_spikes('V2', on_rank='all') == MPI_size)
     assert(st.n_spikes('V2', on_rank='local') == 1)
+    assert(len(st) == MPI_size*6)
 
     assert(np.all(np.sort(st.node_ids('V1')) == np.arange(MPI_size)))
     assert(np.all(np.sort(st.node_ids('V1', on_rank='all')) == np.arange(MPI_size)))
@@ -168,6 +169,18 @@ def test_iterator(st):
     else:
         assert(len(root_spikes) == 0)
 
+    timestamps, populations, node_ids = st.spikes_arrays(on_rank='all', sort_order=sort_order.by_time)
+    assert(len(timestamps) == len(populations) == len(node_ids) == len(all_spikes))
+    assert(set(populations) == {'R{}'.format(r) for r in range(MPI_size)} | {'V1'})
+    assert(np.all(np.diff(timestamps[populations == 'V1']) >= 0))
+    assert(node_ids.dtype == np.uint64)
+
+    root_arrays = st.spikes_arrays(on_rank='root')
+    if MPI_rank == 0:
+        assert(len(root_arrays[0]) == len(all_spikes))
+    else:
+        assert(root_arrays is None)
+
 
 @pytest.mark.skipif(MPI_size < 2, reason='Can only run test using mpi')
 @pytest.mark.parametrize('st', [
@@ -21,9 +21,10 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 import os
+import json
+import struct
 import numpy as np
 import pandas as pd
-import csv
 from array import array
 
 from .core import SortOrder, pop_na, comm, MPI_size, MPI_rank, comm_barrier
@@ -31,36 +32,227 @@ from .core import col_node_ids, col_population, col_timestamps
 from .spike_trains_api import SpikeTrainsAPI
 
 
-def _spikes_filter1(p, t, time_window, populations):
-    return p in populations and time_window[0] <= t <= time_window[1]
-
+class _SpikesFilter(object):
+    """Selects spikes by population and/or time window. Created once for each query and applied to whole arrays of
+    spikes at a time using mask(), rather than being called on every individual spike."""
+    def __init__(self, populations=None, time_window=None):
+        if populations is None:
+            self.populations = None
+        else:
+            self.populations = frozenset([populations] if np.isscalar(populations) else populations)
 
-def _spikes_filter2(p, t, populations):
-    return p in populations
+        if time_window is None:
+            self.time_window = None
+        else:
+            self.time_window = (float(time_window[0]), float(time_window[1]))
+
+    def mask(self, timestamps, pop_codes=None, pop_names=None):
+        """Returns a boolean array of those spikes that pass the filter.
+
+        :param timestamps: array of spike times.
+        :param pop_codes: array of the population of each spike as integer codes, indexing into pop_names. If None
+            assumes all spikes have already been selected by population.
+        :param pop_names: list of population names for each code.
+        """
+        if self.populations is not None and pop_codes is not None:
+            # lookup table of which population codes are selected, indexed directly by each spike's code
+            selected_codes = np.array([pop in self.populations for pop in pop_names], dtype=bool)
+            mask = selected_codes[pop_codes] if len(selected_codes) else np.zeros(len(timestamps), dtype=bool)
+        else:
+            mask = np.ones(len(timestamps), dtype=bool)
 
+        if self.time_window is not None:
+            t_min, t_max = self.time_window
+            mask &= (t_min <= timestamps) & (timestamps <= t_max)
 
-def _spikes_filter3(p, t, time_window):
-    return time_window[0] <= t <= time_window[1]
+        return mask
 
 
 def _create_filter(populations, time_window):
-    from functools import partial
+    return _SpikesFilter(populations=populations, time_window=time_window)
 
-    if populations is None and time_window is None:
-        return lambda p, t: True
+
+def _create_empty_df(with_population_col=True):
+    columns = [col_timestamps, col_population, col_node_ids] if with_population_col else [col_timestamps, col_node_ids]
+    return pd.DataFrame(columns=columns)
+
+
+def _update_time_range(time_range, timestamps):
+    """Expands a [min, max] time range (in place) to include a batch of timestamps."""
+    if len(timestamps) > 0:
+        time_range[0] = min(time_range[0], np.min(timestamps))
+        time_range[1] = max(time_range[1], np.max(timestamps))
+
+
+def _pops_time_range(pop_time_ranges, populations, default_population):
+    """Returns the (min, max) time range of the selected populations from a dictionary of their time ranges. Returns
+    (inf, -inf) if none of them have any spikes."""
     if populations is None:
-        return partial(_spikes_filter3, time_window=time_window)
+        populations = [default_population]
+    elif np.isscalar(populations):
+        populations = [populations]
+
+    pop_ranges = [pop_time_ranges[p] for p in populations if p in pop_time_ranges]
+    return min([r[0] for r in pop_ranges] + [np.inf]), max([r[1] for r in pop_ranges] + [-np.inf])
+
+
+def _gather_time_range(local_range, on_rank='all'):
+    """Combines the time range of the spikes on each rank. Must be called by every rank, returns None on the non-root
+    ranks when on_rank='root'."""
+    if on_rank == 'local':
+        return local_range
+    elif on_rank == 'all':
+        all_ranges = comm.allgather(local_range) if MPI_size > 1 else [local_range]
+    elif on_rank == 'root':
+        all_ranges = comm.gather(local_range, 0) if MPI_size > 1 else [local_range]
+    else:
+        raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
+
+    if all_ranges is None:
+        return None
+    return min(r[0] for r in all_ranges), max(r[1] for r in all_ranges)
+
+
+# Populations are stored as int16 codes rather than as names for every spike
+_max_pop_codes = np.iinfo(np.int16).max + 1
+
+
+def _intern_population(pop_intern, pop_names, population):
+    """Returns the integer code of a population, adding it to the pop_intern (name --> code) and pop_names (code -->
+    name) tables if it doesn't exist. Second value returned is True if the population is new."""
+    code = pop_intern.get(population, None)
+    if code is not None:
+        return code, False
+
+    code = len(pop_names)
+    if code >= _max_pop_codes:
+        raise ValueError('Unable to add population {}, exceeds max of {} populations'.format(
+            population, _max_pop_codes))
+    pop_intern[population] = code
+    pop_names.append(population)
+    return code, True
+
+
+# Layout of a single spike saved in the disk cached buffers, (timestamp, population code, node_id)
+_spikes_rec_dtype = np.dtype([('t', '<f8'), ('p', '<i2'), ('n', '<i8')])
+_spikes_rec_struct = struct.Struct('<dhq')  # Same layout as _spikes_rec_dtype but faster for packing a single spike
+_spikes_itr_chunk_size = 100000  # Max number of spike records loaded into memory at a time when iterating
+
+
+def _pop_names_fname(cache_fname):
+    """Name of the file that saves the population names of a spikes cache file, so it can be read by other ranks."""
+    return '{}.populations.json'.format(os.path.splitext(cache_fname)[0])
 
-    populations = [populations] if np.isscalar(populations) else populations
-    if time_window is None:
-        return partial(_spikes_filter2, populations=populations)
+
+def _spikes_cache_memmap(cache_fname, mode='r'):
+    """Returns a memory-mapped array of the spike records saved in a cache file."""
+    if not os.path.exists(cache_fname) or os.path.getsize(cache_fname) == 0:
+        return np.empty(0, dtype=_spikes_rec_dtype)  # can't mmap an empty file
+    return np.memmap(cache_fname, dtype=_spikes_rec_dtype, mode=mode)
+
+
+def _load_spikes_cache(cache_fname):
+    """Returns a memory-mapped array of the spike records saved in a cache file along with the list of population
+    names used by the file (indexed by population code)."""
+    spikes_arr = _spikes_cache_memmap(cache_fname)
+    if len(spikes_arr) == 0:
+        return spikes_arr, []
+
+    with open(_pop_names_fname(cache_fname), 'r') as f:
+        pop_names = json.load(f)
+    return spikes_arr, pop_names
+
+
+def _filter_spikes_cache(spikes_arr, pop_names, populations=None, time_window=None):
+    """Returns only those spike records that belong to the given populations and time_window."""
+    if populations is None and time_window is None:
+        return spikes_arr
+
+    filter = _create_filter(populations, time_window)
+    return spikes_arr[filter.mask(spikes_arr['t'], spikes_arr['p'], pop_names)]
+
+
+def _node_times_cache(spikes_arr, pop_names, node_id, population, time_window=None):
+    """Returns the timestamps of a single node from an array of spike records, using one combined mask."""
+    mask = _create_filter(population, time_window).mask(spikes_arr['t'], spikes_arr['p'], pop_names)
+    mask &= spikes_arr['n'] == node_id
+    return spikes_arr['t'][mask]
+
+
+def _spikes_cache_itr(spikes_arr, pop_names, populations=None, time_window=None):
+    """Iterates through an array of spike records, returning the (timestamp, population, node_id) of each spike. Only
+    loads a chunk of spikes into memory at a time."""
+    pop_names = np.array(pop_names, dtype=object)
+    filter = None if populations is None and time_window is None else _create_filter(populations, time_window)
+    for beg in range(0, len(spikes_arr), _spikes_itr_chunk_size):
+        chunk = spikes_arr[beg:(beg + _spikes_itr_chunk_size)]
+        if filter is not None:
+            chunk = chunk[filter.mask(chunk['t'], chunk['p'], pop_names)]
+        for spk in zip(chunk['t'].tolist(), pop_names[chunk['p']], chunk['n'].tolist()):
+            yield spk
+
+
+def _spikes_cache_arrays(spikes_arr, pop_names):
+    """Returns the (timestamps, populations, node_ids) arrays from an array of spike records."""
+    pop_names = np.array(pop_names, dtype=object)
+    return np.array(spikes_arr['t']), pop_names[spikes_arr['p']], np.array(spikes_arr['n'], dtype=np.uint64)
+
+
+def _as_node_ids(node_ids):
+    """Returns an array of node_ids as uint64, unless that would change any of their values (eg. a negative node_id
+    saved in a list store), in which case they are returned unchanged."""
+    node_ids = np.asarray(node_ids)
+    if len(node_ids) == 0:
+        return np.array([], dtype=np.uint64)
+    elif node_ids.dtype.kind == 'u' or (node_ids.dtype.kind == 'i' and node_ids.min() >= 0):
+        return node_ids.astype(np.uint64)
+    return node_ids
+
+
+def _pop_spikes_indx(node_ids, timestamps, time_window=None, sort_order=SortOrder.none, time_sorted=False):
+    """Returns the indices of the spikes of a single population that are in the time_window, in sort_order. If
+    time_sorted is True the timestamps are known to already be in order, and don't need to be sorted by time."""
+    if time_sorted:
+        # the time_window is a contiguous block of the timestamps
+        beg, end = (0, len(timestamps)) if time_window is None else \
+            (np.searchsorted(timestamps, time_window[0]), np.searchsorted(timestamps, time_window[1], side='right'))
+        sort_indx = np.arange(beg, max(beg, end))
     else:
-        return partial(_spikes_filter1, populations=populations, time_window=time_window)
+        # spikes already belong to the selected population, only need to filter by time. Filter before sorting so
+        # that only the spikes in the time_window need to be sorted.
+        sort_indx = np.flatnonzero(_create_filter(None, time_window).mask(timestamps))
 
+    if sort_order == SortOrder.by_id:
+        sort_indx = sort_indx[np.argsort(node_ids[sort_indx], kind='stable')]
+    elif sort_order == SortOrder.by_time and not time_sorted:
+        sort_indx = sort_indx[np.argsort(timestamps[sort_indx], kind='stable')]
+    return sort_indx
 
-def _create_empty_df(with_population_col=True):
-    columns = [col_timestamps, col_population, col_node_ids] if with_population_col else [col_timestamps, col_node_ids]
-    return pd.DataFrame(columns=columns)
+
+def _pop_spikes_arrays(pop_name, node_ids, timestamps, time_window=None, sort_order=SortOrder.none,
+                       time_sorted=False):
+    """Returns the (timestamps, populations, node_ids) arrays of the spikes of a single population."""
+    sort_indx = _pop_spikes_indx(node_ids, timestamps, time_window, sort_order, time_sorted)
+    return timestamps[sort_indx], np.full(len(sort_indx), pop_name, dtype=object), node_ids[sort_indx]
+
+
+def _concat_spikes_arrays(spikes_arrays):
+    """Joins a list of (timestamps, populations, node_ids) arrays into a single set of arrays."""
+    if not spikes_arrays:
+        return np.array([], dtype=np.float64), np.array([], dtype=object), np.array([], dtype=np.uint64)
+    return tuple(np.concatenate(col_arrays) for col_arrays in zip(*spikes_arrays))
+
+
+def _pop_spikes_itr(pop_name, node_ids, timestamps, time_window=None, sort_order=SortOrder.none, time_sorted=False):
+    """Iterates through the (timestamp, population, node_id) of the spikes of a single population, stored as separate
+    node_ids and timestamps arrays."""
+    sort_indx = _pop_spikes_indx(node_ids, timestamps, time_window, sort_order, time_sorted)
+
+    # Gather the selected spikes a chunk at a time rather than indexing into the arrays for every spike
+    for beg in range(0, len(sort_indx), _spikes_itr_chunk_size):
+        chunk_indx = sort_indx[beg:(beg + _spikes_itr_chunk_size)]
+        for ts, node_id in zip(timestamps[chunk_indx].tolist(), node_ids[chunk_indx].tolist()):
+            yield ts, pop_name, node_id
 
 
 class STMemoryBuffer(SpikeTrainsAPI):
@@ -71,51 +263,170 @@ class STMemoryBuffer(SpikeTrainsAPI):
     The spikes are stored in memory and very large and/or epiletic simulations may run into memory issues. Not designed
     to work with parallel simulations.
     """
+    node_index_min_queries = 16  # number of get_times() calls on an unchanged population before it is indexed
+
     def __init__(self, default_population=None, store_type='array', **kwargs):
         self._default_population = default_population or kwargs.get('population', None) or pop_na
+        if store_type not in ['list', 'array']:
+            raise AttributeError('Uknown store type {} for SpikeTrains'.format(store_type))
         self._store_type = store_type
-        # self._pop_counts = {self._default_population: 0}  # A count of spikes per population
         self._units = kwargs.get('units', 'ms')  # for backwards compatability default to milliseconds
         self._pops = {}
+        # The time range of each population, and whether its spikes have been added in order of time, are updated only
+        # when needed and only using the spikes added since the last update (see _update_time_stats()).
+        self._pop_time_ranges = {}  # population --> [min, max] timestamps
+        self._pop_time_sorted = {}  # population --> True if spikes have so far been added in order of time
+        self._pop_time_checked = {}  # population --> number of spikes included in the time range/sorted stats
+        self._pop_data_cache = {}  # population --> (n_spikes, node_ids, timestamps) numpy copies of the spikes
+        self._node_ids_cache = {}  # population --> (n_spikes, unique node_ids) when node_ids() was last called
+        self._node_index_cache = {}  # population --> (n_spikes, index) when _node_index() was last built
+        self._node_index_queries = {}  # population --> (n_spikes, number of get_times() calls with that many spikes)
 
     def add_spike(self, node_id, timestamp, population=None, **kwargs):
         population = population or self._default_population
 
-        if population not in self._pops:
-            self._create_store(population)
-        self._pops[population][col_node_ids].append(node_id)
-        self._pops[population][col_timestamps].append(timestamp)
+        pop_data = self._pops.get(population, None)
+        if pop_data is None:
+            pop_data = self._create_store(population)
+        pop_data[col_node_ids].append(node_id)
+        pop_data[col_timestamps].append(timestamp)
 
     def add_spikes(self, node_ids, timestamps, population=None, **kwargs):
         population = population or self._default_population
+        timestamps = np.asarray(timestamps, dtype=np.float64)
         if np.isscalar(node_ids):
-            node_ids = [node_ids]*len(timestamps)
+            node_ids = np.full(timestamps.shape, node_ids)
+        else:
+            node_ids = np.asarray(node_ids)
 
         if len(node_ids) != len(timestamps):
             raise ValueError('node_ids and timestamps must by of the same length')
 
-        if population not in self._pops:
-            self._create_store(population)
-        pop_data = self._pops[population]
-        pop_data[col_node_ids].extend(node_ids)
-        pop_data[col_timestamps].extend(timestamps)
+        if self._store_type == 'array':
+            # array('I') can only hold node_ids that fit in a 32-bit unsigned int, check before casting
+            if len(node_ids) > 0 and (node_ids.min() < 0 or node_ids.max() > np.iinfo(np.uint32).max):
+                raise OverflowError('node_ids must be between 0 and {} for store_type "array"'.format(
+                    np.iinfo(np.uint32).max))
+            node_ids = node_ids.astype(np.uint32)
+
+        pop_data = self._pops.get(population, None)
+        if pop_data is None:
+            pop_data = self._create_store(population)
+        self._extend_store(pop_data[col_node_ids], node_ids)
+        self._extend_store(pop_data[col_timestamps], timestamps)
 
     def _create_store(self, population):
         """Helper for creating storage data struct of a population, so add_spike/add_spikes is consistent."""
 
         # Benchmark Notes:
-        #   Tested with numpy, lists and arrays. np.concate/append is too slow to consider. regular list is ~2-3x
-        #   faster than array, but require 2-4x the amount of memory. For larger and parallelized applications
-        #   (> 100 million spikes) use array since the amount of memory can required can exceed amount available. But
-        #   if memory is not an issue use list.
+        #   Each population is stored separately so reading one population never has to scan the others. Timed adding
+        #   spikes one at a time with add_spike(), which is how the simulators record spikes, 300K spikes at a time:
+        #     * array('I')/array('d'): ~0.09 s per 300K spikes, ~14 MB for 1.1M spikes.
+        #     * list: ~0.07 s per 300K spikes, ~79 MB for 1.1M spikes.
+        #     * a single set of numpy arrays that double in size when full: ~0.18 s per 300K spikes, ~38 MB for 1.1M
+        #       spikes (assigning single elements of a numpy array is slower than array.append).
+        #   Reads copy a population's list/array into numpy arrays, which for array is a single memcpy. For larger and
+        #   parallelized applications (> 100 million spikes) use array since the amount of memory can required can
+        #   exceed amount available. But if memory is not an issue list is slightly faster.
         if self._store_type == 'list':
             self._pops[population] = {col_node_ids: [], col_timestamps: []}
-
-        elif self._store_type == 'array':
+        else:
+            # node_ids are saved as 32-bit unsigned ints
             self._pops[population] = {col_node_ids: array('I'), col_timestamps: array('d')}
 
+        self._pop_time_ranges[population] = [np.inf, -np.inf]
+        self._pop_time_sorted[population] = True
+        self._pop_time_checked[population] = 0
+        return self._pops[population]
+
+    @staticmethod
+    def _extend_store(values, new_values):
+        """Helper for appending a numpy array of values to a population's list or typed array."""
+        if isinstance(values, array):
+            # array.frombytes() is called fromstring() in python 2
+            (getattr(values, 'frombytes', None) or values.fromstring)(new_values.tobytes())
         else:
-            raise AttributeError('Uknown store type {} for SpikeTrains'.format(self._store_type))
+            values.extend(new_values.tolist())
+
+    def _update_time_stats(self, population):
+        """Updates the time range of a population, and whether its spikes are in order of time, with only the spikes
+        that have been added since the last update. Done when they're read rather than on every add_spike()."""
+        timestamps = self._pops[population][col_timestamps]
+        n_checked = self._pop_time_checked[population]
+        if n_checked == len(timestamps):
+            return
+
+        new_timestamps = np.array(timestamps[n_checked:], dtype=np.float64)
+        if self._pop_time_sorted[population]:
+            self._pop_time_sorted[population] = new_timestamps[0] >= self._pop_time_ranges[population][1] and \
+                                                bool(np.all(new_timestamps[:-1] <= new_timestamps[1:]))
+        _update_time_range(self._pop_time_ranges[population], new_timestamps)
+        self._pop_time_checked[population] = len(timestamps)
+
+    def _time_sorted(self, population):
+        """Returns True if the spikes of a population have been added in order of time."""
+        if population not in self._pops:
+            return True
+        self._update_time_stats(population)
+        return self._pop_time_sorted[population]
+
+    def _pop_data(self, population):
+        """Returns the (node_ids, timestamps) of all spikes for a given population as (read-only) numpy arrays. The
+        arrays are kept between calls, and only the spikes added since the last call need to be converted."""
+        pop_data = self._pops.get(population, None)
+        if pop_data is None:
+            return np.array([], dtype=np.uint64), np.array([], dtype=np.float64)
+
+        n_spikes = len(pop_data[col_timestamps])
+        n_cached, node_ids, timestamps = self._pop_data_cache.get(population, (-1, None, None))
+        if n_cached == n_spikes:
+            return node_ids, timestamps
+
+        new_node_ids = _as_node_ids(pop_data[col_node_ids][n_cached:]) if n_cached > 0 else None
+        if new_node_ids is not None and new_node_ids.dtype == node_ids.dtype:
+            new_timestamps = np.array(pop_data[col_timestamps][n_cached:], dtype=np.float64)
+            node_ids = np.concatenate((node_ids, new_node_ids))
+            timestamps = np.concatenate((timestamps, new_timestamps))
+        else:
+            # first call, or new node_ids can't be saved the same way as before (eg. a negative node_id in a list)
+            node_ids = _as_node_ids(pop_data[col_node_ids])
+            timestamps = np.array(pop_data[col_timestamps], dtype=np.float64)
+
+        # the same arrays are returned to every caller, so make sure none of them can change the saved spikes
+        node_ids.flags.writeable = False
+        timestamps.flags.writeable = False
+        self._pop_data_cache[population] = (n_spikes, node_ids, timestamps)
+        return node_ids, timestamps
+
+    def _node_index(self, population):
+        """Returns a (node_ids, offsets, timestamps) index of a population's spikes grouped by node, the spike times of
+        node_ids[i] being timestamps[offsets[i]:offsets[i+1]] in sorted order.
+
+        Building the index means sorting all the population's spikes, which costs about as much as scanning them 20
+        times. So returns None, and the caller should scan the spikes instead, until the population has been queried
+        node_index_min_queries times without any spikes being added in between."""
+        n_spikes = self.n_spikes(population)
+        index_n_spikes, index = self._node_index_cache.get(population, (-1, None))
+        if index_n_spikes == n_spikes:
+            return index
+
+        queries_n_spikes, n_queries = self._node_index_queries.get(population, (-1, 0))
+        n_queries = n_queries + 1 if queries_n_spikes == n_spikes else 1
+        if n_queries < self.node_index_min_queries:
+            self._node_index_cache.pop(population, None)  # don't hold on to an out-of-date index
+            self._node_index_queries[population] = (n_spikes, n_queries)
+            return None
+
+        node_ids, timestamps = self._pop_data(population)
+        if self._time_sorted(population):
+            sort_indx = np.argsort(node_ids, kind='stable')
+        else:
+            sort_indx = np.lexsort((timestamps, node_ids))
+        unique_ids, offsets = np.unique(node_ids[sort_indx], return_index=True)
+        index = (unique_ids, np.append(offsets, len(sort_indx)), timestamps[sort_indx])
+        self._node_index_cache[population] = (n_spikes, index)
+        self._node_index_queries.pop(population, None)
+        return index
 
     def import_spikes(self, obj, **kwargs):
         pass
@@ -134,7 +445,13 @@ class STMemoryBuffer(SpikeTrainsAPI):
         population = population if population is not None else self._default_population
         if population not in self._pops:
             return []
-        return np.unique(self._pops[population][col_node_ids]).astype(np.uint)
+
+        # Only find the unique node_ids again if spikes have been added to the population since the last call
+        n_spikes, node_ids = self._node_ids_cache.get(population, (-1, None))
+        if n_spikes != self.n_spikes(population):
+            node_ids = np.unique(self._pops[population][col_node_ids]).astype(np.uint)
+            self._node_ids_cache[population] = (self.n_spikes(population), node_ids)
+        return node_ids
 
     def units(self, population=None):
         return self._units
@@ -148,16 +465,35 @@ class STMemoryBuffer(SpikeTrainsAPI):
             return 0
         return len(self._pops[population][col_timestamps])
 
+    def time_range(self, populations=None):
+        for p in self._pops:
+            self._update_time_stats(p)
+        return _pops_time_range(self._pop_time_ranges, populations, self._default_population)
+
     def get_times(self, node_id, population=None, time_window=None, **kwargs):
         population = population if population is not None else self._default_population
-        pop = self._pops[population]
-
-        # filter by node_id and (if specified) by time.
-        mask = np.array(pop[col_node_ids]) == node_id
-        ts = np.array(pop[col_timestamps])
+        if population not in self._pops:
+            return np.array([], dtype=np.float64)
+
+        index = self._node_index(population)
+        if index is None:
+            # filter by node_id and (if specified) by time.
+            node_ids, ts = self._pop_data(population)
+            mask = node_ids == node_id
+            if time_window:
+                mask &= (time_window[0] <= ts) & (ts <= time_window[1])
+            return np.sort(ts[mask])  # same order as when looked up in the index
+
+        # Look up the node's (sorted) spike times in the index, rather than scanning through every spike
+        node_ids, offsets, timestamps = index
+        indx = np.searchsorted(node_ids, node_id)
+        if indx == len(node_ids) or node_ids[indx] != node_id:
+            return np.array([], dtype=np.float64)
+
+        ts = timestamps[offsets[indx]:offsets[indx + 1]]
         if time_window:
-            mask &= (time_window[0] <= ts) & (ts <= time_window[1])
-        return ts[mask]
+            ts = ts[np.searchsorted(ts, time_window[0]):np.searchsorted(ts, time_window[1], side='right')]
+        return ts.copy()
 
     def to_dataframe(self, populations=None, sort_order=SortOrder.none, with_population_col=True, **kwargs):
         if populations is None:
@@ -169,10 +505,10 @@ class STMemoryBuffer(SpikeTrainsAPI):
 
         ret_df = None
         for pop_name in selelectd_pops:
-            pop_data = self._pops.get(pop_name, {col_node_ids: [], col_timestamps: []})
+            node_ids, timestamps = self._pop_data(pop_name)
             pop_df = pd.DataFrame({
-                col_node_ids: pop_data[col_node_ids],
-                col_timestamps: pop_data[col_timestamps]
+                col_node_ids: node_ids,
+                col_timestamps: timestamps
             })
             if with_population_col:
                 pop_df[col_population] = pop_name
@@ -199,28 +535,28 @@ class STMemoryBuffer(SpikeTrainsAPI):
             populations = [populations]
 
         for pop_name in populations:
-            pop_data = self._pops.get(pop_name, {col_node_ids: [], col_timestamps: []})
-            timestamps = pop_data[col_timestamps]
-            node_ids = pop_data[col_node_ids]
+            node_ids, timestamps = self._pop_data(pop_name)
+            for spk in _pop_spikes_itr(pop_name, node_ids, timestamps, time_window, sort_order,
+                                       self._time_sorted(pop_name)):
+                yield spk
 
-            if sort_order == SortOrder.by_id:
-                sort_indx = np.argsort(node_ids)
-            elif sort_order == SortOrder.by_time:
-                sort_indx = np.argsort(timestamps)
-            else:
-                sort_indx = range(len(timestamps))
+        return
 
-            filter = _create_filter(populations, time_window)
-            for i in sort_indx:
-                t = timestamps[i]
-                p = pop_name
-                if filter(p=p, t=t):
-                    yield t, p, node_ids[i]
+    def spikes_arrays(self, populations=None, time_window=None, sort_order=SortOrder.none, **kwargs):
+        if populations is None:
+            populations = self.populations
+        elif np.isscalar(populations):
+            populations = [populations]
 
-        return
+        spikes_arrays = []
+        for pop_name in populations:
+            node_ids, timestamps = self._pop_data(pop_name)
+            spikes_arrays.append(_pop_spikes_arrays(pop_name, node_ids, timestamps, time_window, sort_order,
+                                                    self._time_sorted(pop_name)))
+        return _concat_spikes_arrays(spikes_arrays)
 
     def __len__(self):
-        return len(self.to_dataframe())
+        return sum(len(pop_data[col_timestamps]) for pop_data in self._pops.values())
 
 
 class STMPIBuffer(STMemoryBuffer):
@@ -238,8 +574,8 @@ class STMPIBuffer(STMemoryBuffer):
         offsets[1:] = np.cumsum(sizes)[:-1]
         all_n_spikes = np.sum(sizes)
 
-        local_population = self._pops.get(population, {col_node_ids: [], col_timestamps: []})  # if pop not on rank
-        local_node_ids = np.array(local_population[col_node_ids], dtype=np.uint64)
+        local_node_ids, local_timestamps = self._pop_data(population)  # empty if pop not on rank
+        local_node_ids = np.ascontiguousarray(local_node_ids, dtype=np.uint64)
         all_node_ids = np.zeros(all_n_spikes, dtype=np.uint64)
         if on_all_ranks:
             comm.Allgatherv(local_node_ids, [all_node_ids, sizes, offsets, MPI.UINT64_T])
@@ -248,7 +584,7 @@ class STMPIBuffer(STMemoryBuffer):
             if MPI_rank != 0:
                 all_node_ids = None
 
-        local_timestamps = np.array(local_population[col_timestamps], dtype=np.double)
+        local_timestamps = np.ascontiguousarray(local_timestamps, dtype=np.double)
         all_timestamps = np.zeros(all_n_spikes, dtype=np.double)
         if on_all_ranks:
             comm.Allgatherv(local_timestamps, [all_timestamps, sizes, offsets, MPI.DOUBLE])
@@ -391,6 +727,14 @@ class STMPIBuffer(STMemoryBuffer):
         else:
             raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
+    def __len__(self):
+        from mpi4py import MPI
+
+        return comm.allreduce(super(STMPIBuffer, self).__len__(), MPI.SUM)
+
+    def time_range(self, populations=None, on_rank='all'):
+        return _gather_time_range(super(STMPIBuffer, self).time_range(populations=populations), on_rank)
+
     def get_times(self, node_id, population=None, time_window=None, on_rank='all', **kwargs):
         local_times = super(STMPIBuffer, self).get_times(node_id=node_id, population=population,
                                                          time_window=time_window, **kwargs)
@@ -427,19 +771,31 @@ class STMPIBuffer(STMemoryBuffer):
             if node_ids is None:
                 continue
 
-            if sort_order == SortOrder.by_id:
-                sort_indx = np.argsort(node_ids)
-            elif sort_order == SortOrder.by_time:
-                sort_indx = np.argsort(timestamps)
-            else:
-                sort_indx = range(len(timestamps))
+            for spk in _pop_spikes_itr(pop_name, node_ids, timestamps, time_window, sort_order):
+                yield spk
+
+    def spikes_arrays(self, populations=None, time_window=None, sort_order=SortOrder.none, on_rank='all', **kwargs):
+        if on_rank == 'local':
+            return super(STMPIBuffer, self).spikes_arrays(populations=populations, time_window=time_window,
+                                                          sort_order=sort_order, **kwargs)
+        elif on_rank not in ['all', 'root']:
+            raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
+
+        if populations is None:
+            populations = self.populations
+        elif np.isscalar(populations):
+            populations = [populations]
 
-            filter = _create_filter(populations, time_window)
-            for i in sort_indx:
-                t = timestamps[i]
-                p = pop_name
-                if filter(p=p, t=t):
-                    yield t, p, node_ids[i]
+        # _gatherv must be called for the populations in the same order on every rank
+        spikes_arrays = []
+        for pop_name in sorted(populations):
+            node_ids, timestamps = self._gatherv(pop_name, on_all_ranks=(on_rank == 'all'))
+            if node_ids is not None:
+                spikes_arrays.append(_pop_spikes_arrays(pop_name, node_ids, timestamps, time_window, sort_order))
+
+        if on_rank == 'root' and MPI_rank != 0:
+            return None
+        return _concat_spikes_arrays(spikes_arrays)
 
 
 class STCSVBuffer(SpikeTrainsAPI):
@@ -448,10 +804,12 @@ class STCSVBuffer(SpikeTrainsAPI):
     individual spike.
 
     Uses a caching mechanism to periodically save spikes to the disk. Will encure a runtime performance penality but
-    will always have an upper bound on the maximum memory used.
+    will always have an upper bound on the maximum memory used. Spikes are cached as packed binary records (see
+    _spikes_rec_dtype) rather than text so they don't need to be parsed when read back.
 
     If running parallel simulations should use the STMPIBuffer adaptor instead.
     """
+    write_buffer_size = 1 << 20  # Max bytes of spike records held in memory before they are written to the cache
 
     def __init__(self, cache_dir=None, default_population=None, cache_name='spikes', **kwargs):
         self._default_population = default_population or pop_na
@@ -460,36 +818,76 @@ class STCSVBuffer(SpikeTrainsAPI):
         self._cache_dir = cache_dir or '.'
         self._cache_name = cache_name
         self._buffer_filename = self._cache_fname(self._cache_dir)
-        self._buffer_handle = open(self._buffer_filename, 'w')
+        self._buffer_handle = open(self._buffer_filename, 'wb')
+        self._write_buffer = bytearray()  # records added since the last write to the cache file
         self._units = kwargs.get('units', 'ms')
         self._pop_metadata = {}
+        self._pop_time_ranges = {}  # population --> [min, max] timestamps, updated as spikes are added
+        self._node_ids_cache = {}  # population --> (n_spikes, unique node_ids) when node_ids() was last called
+
+        # Populations are saved to the cache as integer codes, the list of names is saved in a separate file on flush()
+        self._pop_intern = {}  # population name --> code
+        self._pop_names = []  # code --> population name
+        self._pop_names_filename = _pop_names_fname(self._buffer_filename)
+        self._pop_names_updated = True
 
     def _cache_fname(self, cache_dir):
         # TODO: Potential problem if multiple SpikeTrains are opened at the same time, add salt to prevent collisions
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
-        return os.path.join(cache_dir, '.bmtk.{}.cache.csv'.format(self._cache_name))
+        return os.path.join(cache_dir, '.bmtk.{}.cache.bin'.format(self._cache_name))
+
+    def _pop_code(self, population):
+        """Helper for finding the integer code of a population, adding the population if it doesn't exist."""
+        code, is_new = _intern_population(self._pop_intern, self._pop_names, population)
+        if is_new:
+            self._pop_metadata[population] = {'n_spikes': 0}
+            self._pop_time_ranges[population] = [np.inf, -np.inf]
+            self._pop_names_updated = True
+        return code
 
     def add_spike(self, node_id, timestamp, population=None, **kwargs):
         population = population or self._default_population
 
-        # NOTE: I looked into using a in-memory buffer to save data and caching only when they reached a threshold,
-        # however on my computer it was actually slower than just calling file.write() each time. Likely the python
-        # file writer is more efficent than what I could write. However still would like to benchmark on a NSF.
-        self._buffer_handle.write('{} {} {}\n'.format(timestamp, population, node_id))
+        # Spikes are staged in memory and written to the cache file in blocks of write_buffer_size bytes, which saves
+        # a file.write() call for every spike.
+        self._write_buffer += _spikes_rec_struct.pack(timestamp, self._pop_code(population), int(node_id))
+        if len(self._write_buffer) >= self.write_buffer_size:
+            self._write_cache()
 
-        if population not in self._pop_metadata:
-            self._pop_metadata[population] = {'node_ids': set(), 'n_spikes': 0}
-        self._pop_metadata[population]['node_ids'].add(node_id)
         self._pop_metadata[population]['n_spikes'] += 1
 
+        time_range = self._pop_time_ranges[population]
+        if timestamp < time_range[0]:
+            time_range[0] = timestamp
+        if timestamp > time_range[1]:
+            time_range[1] = timestamp
+
     def add_spikes(self, node_ids, timestamps, population=None, **kwargs):
+        population = population or self._default_population
+        timestamps = np.asarray(timestamps, dtype=np.float64)
         if np.isscalar(node_ids):
-            for ts in timestamps:
-                self.add_spike(node_ids, ts, population)
+            node_ids = np.full(timestamps.shape, node_ids, dtype=np.int64)
         else:
-            for node_id, ts in zip(node_ids, timestamps):
-                self.add_spike(node_id, ts, population)
+            node_ids = np.asarray(node_ids, dtype=np.int64)
+
+        if len(node_ids) != len(timestamps):
+            raise ValueError('node_ids and timestamps must by of the same length')
+
+        if len(timestamps) == 0:
+            return  # don't add a population without any spikes
+
+        # Write the whole batch of spikes at once rather than calling add_spike() for each individual spike
+        spikes_rec = np.empty(len(timestamps), dtype=_spikes_rec_dtype)
+        spikes_rec['t'] = timestamps
+        spikes_rec['p'] = self._pop_code(population)
+        spikes_rec['n'] = node_ids
+        self._write_buffer += spikes_rec.tobytes()
+        if len(self._write_buffer) >= self.write_buffer_size:
+            self._write_cache()
+
+        self._pop_metadata[population]['n_spikes'] += len(timestamps)
+        _update_time_range(self._pop_time_ranges[population], timestamps)
 
     @property
     def populations(self):
@@ -505,7 +903,15 @@ class STCSVBuffer(SpikeTrainsAPI):
         population = population if population is not None else self._default_population
         if population not in self._pop_metadata:
             return []
-        return list(self._pop_metadata[population]['node_ids'])
+
+        # Read the node_ids from the cache only if spikes have been added to the population since the last call
+        n_spikes, node_ids = self._node_ids_cache.get(population, (-1, None))
+        if n_spikes != self._pop_metadata[population]['n_spikes']:
+            self.flush()
+            spikes_arr = _spikes_cache_memmap(self._buffer_filename)
+            node_ids = np.unique(spikes_arr['n'][spikes_arr['p'] == self._pop_intern[population]])
+            self._node_ids_cache[population] = (self._pop_metadata[population]['n_spikes'], node_ids)
+        return node_ids
 
     def n_spikes(self, population=None):
         population = population if population is not None else self._default_population
@@ -514,76 +920,96 @@ class STCSVBuffer(SpikeTrainsAPI):
         return self._pop_metadata[population]['n_spikes']
 
     def time_range(self, populations=None):
-        return None  # TODO: keep track of largest and smallest values
-        # return np.min(self._timestamps), np.max(self._timestamps)
+        return _pops_time_range(self._pop_time_ranges, populations, self._default_population)
 
     def get_times(self, node_id, population=None, time_window=None, **kwargs):
         self.flush()
         population = population if population is not None else self._default_population
-        return np.array([t[0] for t in self.spikes(populations=population, time_window=time_window) if t[2] == node_id])
+        spikes_arr, pop_names = _load_spikes_cache(self._buffer_filename)
+        return np.array(_node_times_cache(spikes_arr, pop_names, node_id, population, time_window))
 
     def to_dataframe(self, populations=None, sort_order=SortOrder.none, with_population_col=True, **kwargs):
         self.flush()
 
-        sorting_cols = [col_population]
+        spikes_arr, pop_names = _load_spikes_cache(self._buffer_filename)
+        spikes_arr = _filter_spikes_cache(spikes_arr, pop_names, populations=populations)
+
+        # Sort by population name and then (optionally) by time or node_id
+        pop_names = np.array(pop_names, dtype=object)
+        sorting_keys = [np.argsort(np.argsort(pop_names))[spikes_arr['p']]] if len(pop_names) else []
         if sort_order == SortOrder.by_time:
-            sorting_cols = [col_population, col_timestamps]
+            sorting_keys.insert(0, spikes_arr['t'])
         elif sort_order == SortOrder.by_id:
-            sorting_cols = [col_population, col_node_ids]
+            sorting_keys.insert(0, spikes_arr['n'])
+        if sorting_keys:
+            spikes_arr = spikes_arr[np.lexsort(sorting_keys)]
 
-        ret_df = pd.read_csv(
-            self._buffer_filename, sep=' ', names=[col_timestamps, col_population, col_node_ids]
-        ).sort_values(sorting_cols)
-
-        # filter by population
-        if np.isscalar(populations):
-            ret_df = ret_df[ret_df[col_population] == populations]
-        elif populations is not None:
-            ret_df = ret_df[ret_df[col_population].isin(populations)]
+        ret_df = pd.DataFrame({
+            col_timestamps: spikes_arr['t'],
+            col_population: pop_names[spikes_arr['p']],
+            col_node_ids: spikes_arr['n']
+        }, columns=[col_timestamps, col_population, col_node_ids])
 
         if not with_population_col:
             ret_df = ret_df.drop(col_population, axis=1)
 
-        ret_df = ret_df.astype({col_timestamps: np.float, col_node_ids: np.int})
-
         return ret_df
 
+    def _write_cache(self):
+        """Writes any spike records staged in memory to the cache file."""
+        if self._write_buffer:
+            self._buffer_handle.write(self._write_buffer)
+            del self._write_buffer[:]
+
     def flush(self):
+        self._write_cache()
         self._buffer_handle.flush()
+        if self._pop_names_updated:
+            with open(self._pop_names_filename, 'w') as f:
+                json.dump(self._pop_names, f)
+            self._pop_names_updated = False
 
     def close(self):
         self._buffer_handle.close()
-        if os.path.exists(self._buffer_filename):
-            os.remove(self._buffer_filename)
+        for file_name in [self._buffer_filename, self._pop_names_filename]:
+            if os.path.exists(file_name):
+                os.remove(file_name)
 
     def spikes(self, populations=None, time_window=None, sort_order=SortOrder.none, **kwargs):
         self.flush()
 
         self._sort_buffer_file(self._buffer_filename, sort_order)
-        filter_fnc = _create_filter(populations, time_window)
-        with open(self._buffer_filename, 'r') as csvfile:
-            csv_reader = csv.reader(csvfile, delimiter=' ')
-            for row in csv_reader:
-                t = float(row[0])
-                p = row[1]
-                if filter_fnc(p=p, t=t):
-                    yield t, p, int(row[2])
+        spikes_arr, pop_names = _load_spikes_cache(self._buffer_filename)
+        for spk in _spikes_cache_itr(spikes_arr, pop_names, populations, time_window):
+            yield spk
 
         return
 
+    def spikes_arrays(self, populations=None, time_window=None, sort_order=SortOrder.none, **kwargs):
+        self.flush()
+
+        self._sort_buffer_file(self._buffer_filename, sort_order)
+        spikes_arr, pop_names = _load_spikes_cache(self._buffer_filename)
+        return _spikes_cache_arrays(_filter_spikes_cache(spikes_arr, pop_names, populations, time_window), pop_names)
+
     def _sort_buffer_file(self, file_name, sort_order):
-        # sort a spikes cache file
-        # Currently we just read "file_name" into a dataframe, sort it, and resave it to the file
+        # sort a spikes cache file, returns True if the file had to be reordered
         if sort_order == SortOrder.by_time:
-            sort_col = 'time'
+            sort_col = 't'
         elif sort_order == SortOrder.by_id:
-            sort_col = 'node'
+            sort_col = 'n'
         else:
-            return
+            return False
+
+        # Sorts the memory-mapped file in place using only the key column, skipped if the file is already in order.
+        spikes_arr = _spikes_cache_memmap(file_name, mode='r+')
+        sort_keys = spikes_arr[sort_col]
+        if len(sort_keys) < 2 or np.all(sort_keys[:-1] <= sort_keys[1:]):
+            return False
 
-        tmp_spikes_ds = pd.read_csv(file_name, sep=' ', names=['time', 'population', 'node'])
-        tmp_spikes_ds = tmp_spikes_ds.sort_values(by=sort_col)
-        tmp_spikes_ds.to_csv(file_name, sep=' ', index=False, header=False)
+        spikes_arr[:] = spikes_arr[np.argsort(sort_keys, kind='stable')]
+        spikes_arr.flush()
+        return True
 
 
 class STCSVMPIBuffer(STCSVBuffer):
@@ -593,48 +1019,108 @@ class STCSVMPIBuffer(STCSVBuffer):
         self._cache_name = cache_name
         self._all_ranks_data = {}
 
+        # Each rank appends spikes to its own cache file. When the spikes of all ranks are needed they're collectively
+        # written into one shared cache file, each rank's spikes in a contiguous block (see _consolidate()).
+        self._cache_version = 0  # updated every time the local cache file is re-sorted
+        self._shared_cache_state = None  # (n_spikes, cache_version) of all ranks when the shared cache was written
+        self._shared_cache_spans = []  # (begin, end) records of each rank in the shared cache file
+
         super(STCSVMPIBuffer, self).__init__(cache_dir, default_population=default_population, **kwargs)
 
+        if MPI_size > 1:
+            self._shared_cache_filename = os.path.join(self._cache_dir, '.bmtk.{}.cache.all.bin'.format(cache_name))
+        else:
+            self._shared_cache_filename = self._buffer_filename
+
     def _cache_fname(self, cache_dir):
         if self.mpi_rank == 0:
             if not os.path.exists(self._cache_dir):
                 os.makedirs(self._cache_dir)
         comm_barrier()
 
-        return os.path.join(self._cache_dir, '.bmtk.{}.cache.node{}.csv'.format(self._cache_name, self.mpi_rank))
+        return os.path.join(self._cache_dir, '.bmtk.{}.cache.node{}.bin'.format(self._cache_name, self.mpi_rank))
+
+    def _sort_buffer_file(self, file_name, sort_order):
+        reordered = super(STCSVMPIBuffer, self)._sort_buffer_file(file_name, sort_order)
+        if reordered:
+            self._cache_version += 1
+        return reordered
+
+    def _consolidate(self):
+        """Collectively writes the cached spikes of every rank into the shared cache file using MPI-IO, with each rank
+        writing its spikes into its own contiguous block of the file. Must be called on all ranks. The shared file is
+        only rewritten if a rank has added or re-sorted spikes since the last time it was called."""
+        self.flush()
+        local_spikes = _spikes_cache_memmap(self._buffer_filename)
+        n_local = len(local_spikes)
+        if MPI_size == 1:
+            self._shared_cache_spans = [(0, n_local)]
+            return
+
+        all_states = comm.allgather((n_local, self._cache_version))
+        if all_states == self._shared_cache_state:
+            return
+
+        from mpi4py import MPI
+
+        # Population codes are local to each rank, convert them to codes of a population table shared by all ranks
+        all_pop_names = sorted(set().union(*comm.allgather(self._pop_names)))
+        codes_map = np.array([all_pop_names.index(p) for p in self._pop_names], dtype=np.int16)
+
+        rec_size = _spikes_rec_dtype.itemsize
+        offsets = np.concatenate(([0], np.cumsum([n for n, _ in all_states]))).astype(np.int64)
+        n_chunks = max(int(np.ceil(n/float(_spikes_itr_chunk_size))) for n, _ in all_states)
+
+        fh = MPI.File.Open(comm, self._shared_cache_filename, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+        fh.Set_size(int(offsets[-1])*rec_size)
+        for c in range(n_chunks):
+            # Write_at_all is collective, ranks with fewer spikes will write empty chunks
+            beg = min(c*_spikes_itr_chunk_size, n_local)
+            end = min(beg + _spikes_itr_chunk_size, n_local)
+            chunk = np.array(local_spikes[beg:end])
+            chunk['p'] = codes_map[chunk['p']] if len(chunk) else chunk['p']
+            fh.Write_at_all(int(offsets[MPI_rank] + beg)*rec_size, [chunk.view(np.uint8), MPI.BYTE])
+        fh.Close()
+
+        if MPI_rank == 0:
+            with open(_pop_names_fname(self._shared_cache_filename), 'w') as f:
+                json.dump(all_pop_names, f)
+        comm_barrier()
+
+        self._shared_cache_state = all_states
+        self._shared_cache_spans = list(zip(offsets[:-1], offsets[1:]))
 
-    def _all_cached_files(self):
-        return [os.path.join(self._cache_dir, '.bmtk.{}.cache.node{}.csv'.format(self._cache_name, r))
-                for r in range(MPI_size)]
+    def _gather(self, on_rank='all'):
+        """Combines the spike counts of every population across all ranks. Only exchanges the counts each rank already
+        keeps about its own spikes, rather than reading through the spikes of every rank. Must be called on all ranks,
+        with on_rank='root' only rank 0 will have the combined results."""
+        if MPI_size == 1:
+            gathered_data = [self._pop_metadata]
+        elif on_rank == 'all':
+            gathered_data = comm.allgather(self._pop_metadata)
+        elif on_rank == 'root':
+            gathered_data = comm.gather(self._pop_metadata, 0)
+        else:
+            raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
-    def _gather(self):
         self._all_ranks_data = {}
-        for fn in self._all_cached_files():
-            if not os.path.exists(fn):
-                continue
-            with open(fn, 'r') as csvfile:
-                csv_reader = csv.reader(csvfile, delimiter=' ')
-                for row in csv_reader:
-                    pop = row[1]
-                    if pop not in self._all_ranks_data:
-                        self._all_ranks_data[pop] = {'n_spikes': 0, 'node_ids': set()}
-
-                    self._all_ranks_data[pop]['n_spikes'] += 1  # self._all_ranks_data.get(pop, 0) + 1
-                    self._all_ranks_data[pop]['node_ids'].add(int(row[2]))
-
-    def _gather_times(self, node_id, population):
-        timestamps = []
-        for fn in self._all_cached_files():
-            if not os.path.exists(fn):
-                continue
-            with open(fn, 'r') as csvfile:
-                csv_reader = csv.reader(csvfile, delimiter=' ')
-                for row in csv_reader:
-                    pop = row[1]
-                    nid = int(row[2])
-                    if nid == node_id and pop == population:
-                        timestamps.append(float(row[0]))
-        return timestamps
+        for rank_data in (gathered_data or []):
+            for pop, pop_data in rank_data.items():
+                if pop not in self._all_ranks_data:
+                    self._all_ranks_data[pop] = {'n_spikes': 0}
+
+                self._all_ranks_data[pop]['n_spikes'] += pop_data['n_spikes']
+
+    def _gather_times(self, node_id, population, time_window=None):
+        spikes_arr, pop_names = _load_spikes_cache(self._shared_cache_filename)
+        return _node_times_cache(spikes_arr, pop_names, node_id, population, time_window).tolist()
+
+    def close(self):
+        super(STCSVMPIBuffer, self).close()
+        if MPI_size > 1 and MPI_rank == 0:
+            for file_name in [self._shared_cache_filename, _pop_names_fname(self._shared_cache_filename)]:
+                if os.path.exists(file_name):
+                    os.remove(file_name)
 
     @property
     def populations(self):
@@ -646,21 +1132,12 @@ class STCSVMPIBuffer(STCSVBuffer):
             pops.sort()  # import populations are in the same order on all ranks
             return pops
 
-        self.flush()
-        comm_barrier()
-        pops = None
-        if on_rank == 'all':
-            self._gather()
-            pops = list(self._all_ranks_data.keys())
-
-        elif on_rank == 'root':
-            if MPI_rank == 0:
-                self._gather()
-                pops = list(self._all_ranks_data.keys())
-
-        if pops is not None:
-            pops.sort()
+        self._gather(on_rank)
+        if on_rank == 'root' and MPI_rank != 0:
+            return None
 
+        pops = list(self._all_ranks_data.keys())
+        pops.sort()
         return pops
 
     def n_spikes(self, population=None, on_rank='all'):
@@ -668,74 +1145,56 @@ class STCSVMPIBuffer(STCSVBuffer):
             return super(STCSVMPIBuffer, self).n_spikes(population=population)
 
         population = population if population is not None else self._default_population
-        self.flush()
-        comm_barrier()
-
-        if on_rank == 'all':
-            self._gather()
-            return self._all_ranks_data[population]['n_spikes'] if population in self._all_ranks_data else 0
-
-        elif on_rank == 'root':
-            if MPI_rank == 0:
-                self._gather()
-                return self._all_ranks_data[population]['n_spikes'] if population in self._all_ranks_data else 0
-            else:
-                return None
+        self._gather(on_rank)
+        if on_rank == 'root' and MPI_rank != 0:
+            return None
 
-        else:
-            raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
+        return self._all_ranks_data[population]['n_spikes'] if population in self._all_ranks_data else 0
 
     def node_ids(self, population=None, on_rank='all'):
         if on_rank == 'local':
             return super(STCSVMPIBuffer, self).node_ids(population=population)
 
-        population = population if population is not None else self._default_population
-        self.flush()
-        comm_barrier()
-
-        if on_rank == 'all':
-            self._gather()
-            return list(self._all_ranks_data[population]['node_ids']) if population in self._all_ranks_data else []
-
+        local_node_ids = super(STCSVMPIBuffer, self).node_ids(population=population)
+        if MPI_size == 1:
+            return local_node_ids
+        elif on_rank == 'all':
+            gathered_nodes = comm.allgather(local_node_ids)
         elif on_rank == 'root':
-            if MPI_rank == 0:
-                self._gather()
-                return list(self._all_ranks_data[population]['node_ids']) if population in self._all_ranks_data else []
-            else:
-                return None
-
+            gathered_nodes = comm.gather(local_node_ids, 0)
         else:
             raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
+        if gathered_nodes is None:
+            return None
+        else:
+            return np.unique(np.concatenate(gathered_nodes)).astype(np.int64)
+
+    def time_range(self, populations=None, on_rank='all'):
+        return _gather_time_range(super(STCSVMPIBuffer, self).time_range(populations=populations), on_rank)
+
     def get_times(self, node_id, population=None, time_window=None, on_rank='all', **kwargs):
         # population = population if population is not None else self._default_population
         if on_rank == 'local':
-            # calling super.get_times() will fail since it relies on spikes()
-            return np.array([t[0] for t in super(STCSVMPIBuffer, self).spikes(
-                populations=population, time_window=time_window) if t[2] == node_id])
+            return super(STCSVMPIBuffer, self).get_times(node_id, population=population, time_window=time_window)
 
         population = population if population is not None else self._default_population
-        self.flush()
-        comm_barrier()
+        self._consolidate()
 
         if on_rank == 'all':
-            timestamps = self._gather_times(node_id=node_id, population=population)
+            return self._gather_times(node_id, population, time_window)
         elif on_rank == 'root':
-            timestamps = self._gather_times(node_id, population) if MPI_rank == 0 else None
+            return self._gather_times(node_id, population, time_window) if MPI_rank == 0 else None
         else:
             raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
-        if time_window is not None:
-            timestamps = [t for t in timestamps if time_window[0] <= t <= time_window[1]]
-
-        return timestamps
-
     def spikes(self, populations=None, time_window=None, sort_order=SortOrder.none, on_rank='all', **kwargs):
         if on_rank == 'local':
             return super(STCSVMPIBuffer, self).spikes(populations=populations, time_window=time_window,
                                                       sort_order=sort_order, **kwargs)
         self.flush()
-        comm_barrier()
+        self._sort_buffer_file(self._buffer_filename, sort_order)  # each rank only sorts its own cache file
+        self._consolidate()
 
         if on_rank == 'all':
             return self._sort_helper(populations, time_window, sort_order)
@@ -745,65 +1204,54 @@ class STCSVMPIBuffer(STCSVBuffer):
             else:
                 return []
 
-    def _sort_helper(self, populations, time_window, sort_order):
-        filter_fnc = _create_filter(populations, time_window)
-        if sort_order == SortOrder.by_time or sort_order == SortOrder.by_id:
-            for file_name in self._all_cached_files():
-                if not os.path.exists(file_name):
-                    continue
+    def spikes_arrays(self, populations=None, time_window=None, sort_order=SortOrder.none, on_rank='all', **kwargs):
+        if on_rank == 'local':
+            return super(STCSVMPIBuffer, self).spikes_arrays(populations=populations, time_window=time_window,
+                                                             sort_order=sort_order, **kwargs)
+        elif on_rank not in ['all', 'root']:
+            raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
-                self._sort_buffer_file(file_name, sort_order)
+        self.flush()
+        self._consolidate()
+        if on_rank == 'root' and MPI_rank != 0:
+            return None
 
-            return self._sorted_itr(filter_fnc, 0 if sort_order == SortOrder.by_time else 2)
-        else:
-            return self._unsorted_itr(filter_fnc)
+        spikes_arr, pop_names = _load_spikes_cache(self._shared_cache_filename)
+        spikes_arr = _filter_spikes_cache(spikes_arr, pop_names, populations, time_window)
+        if sort_order == SortOrder.by_time or sort_order == SortOrder.by_id:
+            sort_col = 't' if sort_order == SortOrder.by_time else 'n'
+            spikes_arr = spikes_arr[np.argsort(spikes_arr[sort_col], kind='stable')]
+        return _spikes_cache_arrays(spikes_arr, pop_names)
 
-    def _unsorted_itr(self, filter_fnc):
-        for fn in self._all_cached_files():
-            if not os.path.exists(fn):
-                continue
+    def _sort_helper(self, populations, time_window, sort_order):
+        if sort_order == SortOrder.by_time or sort_order == SortOrder.by_id:
+            # Assumes the cached files on all ranks have already been sorted
+            return self._sorted_itr(populations, time_window, 0 if sort_order == SortOrder.by_time else 2)
+        else:
+            return self._unsorted_itr(populations, time_window)
 
-            with open(fn, 'r') as csvfile:
-                csv_reader = csv.reader(csvfile, delimiter=' ')
-                for row in csv_reader:
-                    t = float(row[0])
-                    p = row[1]
-                    if filter_fnc(p=p, t=t):
-                        yield t, p, int(row[2])
+    def _unsorted_itr(self, populations, time_window):
+        spikes_arr, pop_names = _load_spikes_cache(self._shared_cache_filename)
+        for spk in _spikes_cache_itr(spikes_arr, pop_names, populations, time_window):
+            yield spk
 
         return
 
-    def _sorted_itr(self, filter_fnc, sort_col):
+    def _sorted_itr(self, populations, time_window, sort_col):
         """Iterates through all the spikes on each rank, returning them in the specified order"""
         import heapq
 
-        def next_row(csv_reader):
-            try:
-                rn = next(csv_reader)
-                row = [float(rn[0]), rn[1], int(rn[2])]
-                return row[sort_col], row, csv_reader
-            except StopIteration:
-                return None
-            except ValueError as ie:
-                print(ie)
-                exit()
-
-        # Assumes all the ranked cached files have already been sorted. Pop the top row off of each rank onto the
-        # heap, pull next spike off the heap and replace. Repeat until all spikes on all ranks have been poped.
-        h = []
-        readers = [next_row(csv.reader(open(fn, 'r'), delimiter=' ')) for fn in self._all_cached_files()]
-        for r in readers:
-            if r is not None:  # Some ranks may not have produced any spikes
-                heapq.heappush(h, r)
-
-        while h:
-            v, row, csv_reader = heapq.heappop(h)
-            n = next_row(csv_reader)
-            if n:
-                heapq.heappush(h, n)
-
-            if filter_fnc(row[1], row[2]):
-                yield row
+        def keyed_itr(rank, rank_spikes):
+            # heapq.merge() only takes a key function in python 3, instead decorate each row with its key. Uses the
+            # rank as a tie-breaker so the rows themselves are never compared.
+            for row in _spikes_cache_itr(rank_spikes, pop_names, populations, time_window):
+                yield row[sort_col], rank, row
+
+        # Assumes the spikes of each rank have already been sorted, do a k-way merge of the spikes across ranks.
+        spikes_arr, pop_names = _load_spikes_cache(self._shared_cache_filename)
+        ranked_itrs = [keyed_itr(r, spikes_arr[beg:end]) for r, (beg, end) in enumerate(self._shared_cache_spans)]
+        for _, _, row in heapq.merge(*ranked_itrs):
+            yield row
 
 
 class STCSVMPIBufferV2(STCSVMPIBuffer):
@@ -813,35 +1261,29 @@ class STCSVMPIBufferV2(STCSVMPIBuffer):
             return super(STCSVMPIBufferV2, self).to_dataframe(populations=populations, sort_order=populations,
                                                               with_population_col=with_population_col, **kwargs)
 
-        if np.isscalar(populations):
-            populations = [populations]  # so we can use dataframe.isin() later
-
         ret_df = None
-        self.flush()
-        comm_barrier()
+        self._consolidate()
         if on_rank == 'all':
-            cached_files = self._all_cached_files()
+            cached_files = [self._shared_cache_filename]
         elif on_rank == 'root':
-            cached_files = self._all_cached_files() if MPI_rank == 0 else []
+            cached_files = [self._shared_cache_filename] if MPI_rank == 0 else []
         else:
             raise ValueError('Invalid option "{}" for mpi on_rank parameter'.format(on_rank))
 
         for file_name in cached_files:
-            if not os.path.exists(file_name):
-                continue
-
-            df = pd.read_csv(file_name, sep=' ', names=[col_timestamps, col_population, col_node_ids])
-            if populations is not None:
-                df = df[df[col_population].isin(populations)]
+            spikes_arr, pop_names = _load_spikes_cache(file_name)
+            spikes_arr = _filter_spikes_cache(spikes_arr, pop_names, populations=populations)
+            df = pd.DataFrame({
+                col_timestamps: spikes_arr['t'],
+                col_population: np.array(pop_names, dtype=object)[spikes_arr['p']],
+                col_node_ids: spikes_arr['n']
+            }, columns=[col_timestamps, col_population, col_node_ids])
 
             if not with_population_col:
                 df.drop(col_population, axis=1)
             ret_df = df if ret_df is None else ret_df.append(df)
 
         if ret_df is not None:
-            # pandas doesn't always do a good job of reading in the correct dtype for each column
-            ret_df = ret_df.astype({col_timestamps: np.float, col_node_ids: np.int})
-
             if sort_order == SortOrder.by_time:
                 ret_df = ret_df.sort_values(col_timestamps)
             elif sort_order == SortOrder.by_id:
@@ -144,6 +144,23 @@ class SpikeTrainsAPI(object):
         """
         raise NotImplementedError()
 
+    def spikes_arrays(self, populations=None, time_window=None, sort_order=SortOrder.none, **kwargs):
+        """Returns the same spikes as spikes(), in the same order, but as three aligned arrays rather than one spike
+        at a time::
+
+            timestamps, populations, node_ids = spike_trains.spikes_arrays()
+
+        :param populations: string or list of strings, used to select specific node_populations. By default all
+            populations with spikes data is returned
+        :param time_window:
+        :param sort_order:
+        :param kwargs:
+        :return: tuple of numpy arrays (timestamps, populations, node_ids)
+        """
+        spikes = list(self.spikes(populations=populations, time_window=time_window, sort_order=sort_order, **kwargs))
+        return np.array([s[0] for s in spikes], dtype=np.float64), np.array([s[1] for s in spikes], dtype=object), \
+            np.array([s[2] for s in spikes], dtype=np.uint64)
+
     def to_sonata(self, path, mode='w', sort_order=SortOrder.none, **kwargs):
         """Write current spike-trains to a sonata hdf5 file
 
@@ -22,6 +22,7 @@
 #
 import os
 import csv
+import itertools
 import h5py
 import numpy as np
 
@@ -30,6 +31,9 @@ from .core import MPI_rank, comm_barrier
 from bmtk.utils.sonata.utils import add_hdf5_magic, add_hdf5_version
 
 
+_csv_write_chunk_size = 100000  # Max number of spike rows passed to the csv writer at a time
+
+
 def write_sonata(path, spiketrain_reader, mode='w', sort_order=SortOrder.none, units='ms',
                  population_renames=None, **kwargs):
     path_dir = os.path.dirname(path)
@@ -133,10 +137,21 @@ def write_csv_itr(path, spiketrain_reader, mode='w', sort_order=SortOrder.none,
         if include_header:
             csv_writer.writerow(cols_to_print)
 
-    for spk in spiketrain_reader.spikes(sort_order=sort_order):
+    # Pass rows to the csv writer a chunk at a time rather than calling writerow() for every spike. spikes() still
+    # needs to be iterated over on every rank.
+    spikes_itr = spiketrain_reader.spikes(sort_order=sort_order)
+    while True:
+        spikes_chunk = list(itertools.islice(spikes_itr, _csv_write_chunk_size))
+        if not spikes_chunk:
+            break
+
         if MPI_rank == 0:
-            ts = spk[0]*conv_factor
-            c_data = [ts, spk[1], spk[2]] if include_population else [ts, spk[2]]
-            csv_writer.writerow(c_data)
+            if include_population:
+                csv_writer.writerows([(ts*conv_factor, p, n) for ts, p, n in spikes_chunk])
+            else:
+                csv_writer.writerows([(ts*conv_factor, n) for ts, _, n in spikes_chunk])
+
+    if MPI_rank == 0:
+        f.close()
 
     comm_barrier()